@@ -0,0 +1,140 @@
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ase.units import Bohr, Rydberg
+
+from tilde.core.settings import EXAMPLE_DIR
+from tilde.parsers.QuantumESPRESSO.QuantumESPRESSO import QuantumESPRESSO
+
+
+class Test_QuantumESPRESSO(unittest.TestCase):
+    # cubic cell of 10 bohr with two atoms
+    structure = (
+        "     celldm(1)=  10.000000  celldm(2)=   0.000000  celldm(3)=   0.000000\n"
+        "     crystal axes: (cart. coord. in units of alat)\n"
+        "               a(1) = (   1.000000   0.000000   0.000000 )\n"
+        "               a(2) = (   0.000000   1.000000   0.000000 )\n"
+        "               a(3) = (   0.000000   0.000000   1.000000 )\n"
+        "\n"
+        "     site n.     atom                  positions (alat units)\n"
+        "         1           Sr  tau(   1) = (   0.0000000   0.0000000   0.0000000  )\n"
+        "         2           Ti  tau(   2) = (   0.5000000   0.5000000   0.5000000  )\n"
+        "\n"
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        cls.source = os.path.join(EXAMPLE_DIR, 'QuantumESPRESSO', 'STO.out')
+        cls.sample = QuantumESPRESSO(cls.source)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def parse_text(self, text):
+        target = os.path.join(self.tmpdir, 'sample.out')
+        with open(target, 'w') as f:
+            f.write(text)
+        return QuantumESPRESSO(target)
+
+    def test_info_values(self):
+        self.assertEqual(self.sample.info['prog'], '5.2.0')
+        self.assertEqual(self.sample.info['H'], 'PBEsol')
+        self.assertEqual(self.sample.info['H_types'], [0x2])
+        self.assertEqual(self.sample.info['finished'], 0x2)
+        self.assertEqual(self.sample.info['duration'], '0.17')
+        self.assertAlmostEqual(self.sample.info['energy'], -3899.55435, places=4)
+
+    def test_final_structure(self):
+        self.assertEqual(len(self.sample.structures), 1)
+        structure = self.sample.structures[-1]
+        self.assertEqual(structure.get_chemical_symbols(), ['Sr', 'Ti', 'O', 'O', 'O'])
+        self.assertAlmostEqual(structure.cell[0][0], 3.888287, places=5)
+        self.assertAlmostEqual(structure.positions[1][2], 1.944144, places=5)
+
+    def test_bands(self):
+        self.assertEqual(self.sample.info['k'], '20 pts/BZ')
+        self.assertEqual(len(self.sample.electrons['bands'].abscissa), 20)
+
+    def test_parse_many(self):
+        calcs = list(QuantumESPRESSO.parse_many([self.source, self.source], workers=2))
+        self.assertEqual(len(calcs), 2)
+        for calc in calcs:
+            self.assertEqual(calc.info['energy'], self.sample.info['energy'])
+            self.assertEqual(calc.structures[-1].get_chemical_symbols(), self.sample.structures[-1].get_chemical_symbols())
+
+    def test_cell_parameters_without_structure(self):
+        sample = self.parse_text("CELL_PARAMETERS (bohr)\n   1.0 0.0 0.0\n   0.0 1.0 0.0\n   0.0 0.0 1.0\n")
+        self.assertEqual(sample.structures, [])
+
+    def test_eof_inside_eigenvalues(self):
+        with open(self.source) as f:
+            head = f.readlines()[:300]
+        sample = self.parse_text(''.join(head))
+        self.assertIn('Warning: highest occupied state not found!', sample.info['warns'])
+        self.assertEqual(len(sample.structures), 1)
+
+    def test_positions_units(self):
+        for header, mult in (
+            ("ATOMIC_POSITIONS {angstrom}", 1),
+            ("ATOMIC_POSITIONS bohr", Bohr),
+            ("ATOMIC_POSITIONS (Bohr)", Bohr),
+            ("ATOMIC_POSITIONS", 10 * Bohr), # scaled
+        ):
+            sample = self.parse_text(self.structure + header + "\nSr 0.0 0.0 0.0\nTi 0.25 0.25 0.25\n")
+            self.assertAlmostEqual(sample.structures[-1].positions[1][0], 0.25 * mult, places=6, msg=header)
+
+    def test_cell_parameters_units(self):
+        sample = self.parse_text(self.structure + "CELL_PARAMETERS (bohr)\n   12.0 0.0 0.0\n   0.0 12.0 0.0\n   0.0 0.0 12.0\n")
+        structure = sample.structures[-1]
+        self.assertAlmostEqual(structure.cell[2][2], 12 * Bohr, places=6)
+        self.assertAlmostEqual(structure.positions[1][2], 6 * Bohr, places=6)
+
+    def test_unindented_eigenvalues(self):
+        sample = self.parse_text(self.structure +
+            "     End of self-consistent calculation\n\n"
+            "          k = 0.0000 0.0000 0.0000 (  1935 PWs)   bands (ev):\n\n"
+            "-46.0912 -22.4539\n"
+            "-4.4820 7.2364\n\n"
+            "     highest occupied level (ev):     7.2364\n"
+        )
+        self.assertEqual(sample.info['warns'], ['No input found!'])
+        self.assertEqual(len(sample.electrons['bands'].stripes), 4)
+
+    def test_first_completed_run_kept(self):
+        sample = self.parse_text(
+            "!    total energy              =      -1.00000000 Ry\n"
+            "     PWSCF        :      1.00s CPU         1.20s WALL\n\n"
+            "   This run was terminated on:  14:41:15  22Dec2015\n\n"
+            "!    total energy              =      -2.00000000 Ry\n"
+        )
+        self.assertAlmostEqual(sample.info['energy'], -1 * Rydberg)
+
+    def test_scan_to_eof_without_timing(self):
+        sample = self.parse_text(
+            "!    total energy              =      -1.00000000 Ry\n\n"
+            "   This run was terminated on:  14:41:15  22Dec2015\n\n"
+            "!    total energy              =      -2.00000000 Ry\n"
+        )
+        self.assertAlmostEqual(sample.info['energy'], -2 * Rydberg)
+        self.assertEqual(sample.info['finished'], 0x2)
+
+    def test_incomplete_positions_skipped(self):
+        for tail in ("Sr 0.0 0.0 0.0\n", "Sr 0.0 0.0 0.0\nTi 0.25\n"):
+            sample = self.parse_text(self.structure + "ATOMIC_POSITIONS (angstrom)\n" + tail)
+            self.assertAlmostEqual(sample.structures[-1].positions[1][0], 5 * Bohr, places=6)
+
+    def test_duration_values(self):
+        for line, duration in (
+            ("     PWSCF        :      2.54s CPU         2.70s WALL", '0.00'),
+            ("     PWSCF        :      0.57s CPU time,    1h 3m wall time", '1.05'),
+            ("     PWSCF        :  1h23m CPU  1h25m WALL", '1.42'),
+            ("     PWSCF        :  1d 2h 1m CPU  1d 2h 3m WALL", '26.05'),
+        ):
+            sample = self.parse_text(line + "\n")
+            self.assertEqual(sample.info['duration'], duration, msg=line)
@@ -5,8 +5,9 @@ TODO: check ibrav settings, parsing might be wrong
 """
 from __future__ import division
 
-import os
-import datetime, time
+import os, re
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
 
 from numpy import dot, array, transpose, linalg
 
@@ -18,7 +19,136 @@ from ase.data import chemical_symbols
 from ase.units import Bohr, Rydberg
 
 
+# all the lines of interest: fixed prefixes, then the markers which are printed indented
+# NB matched from the line start only, as scanning each line through is much slower
+_SCANNER = re.compile(
+    rb'(?P<celldm>     celldm)|(?P<cell>     crystal axes:)|(?P<sites>     site n\.)|(?P<energy>!    total energy)'
+    rb'|(?P<xc>     Exchange-correlation)|(?P<prog>     Program PWSCF)|(?P<timing>     PWSCF        :)'
+    rb'|(?P<nat>     number of atoms/cell)'
+    rb'| *(?:(?P<terminated>This run was terminated on)|(?P<cell_parameters>CELL_PARAMETERS)|(?P<positions>ATOMIC_POSITIONS)'
+    rb'|(?P<eigenvalues>End of self-consistent calculation|End of band structure calculation))'
+)
+
+_PWSCF_VER_RE = re.compile(r'Program PWSCF\s+(?:v\.)?(\S+)\s+starts ')
+# e.g. 9m54.04s WALL, 1h23m WALL or older 1h 3m wall time
+_WALL_RE = re.compile(r'CPU(?: time)?,?\s+([\d.dhms ]+?)\s*(?:WALL|wall)')
+_DURATION_RE = re.compile(r'(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?(?:([\d.]+)s)?$')
+
+_CHEMICAL_SYMBOLS = frozenset(chemical_symbols)
+_DIGITS = '0123456789'
+
+# units of a card: either (unit), {unit} or a bare word following its name
+_UNIT_RE = re.compile(r' *[A-Z_]+\b\W*(\w+)')
+# NB alat is known only per calculation, crystal means the scaled positions
+_UNIT_MULT = {'bohr': Bohr, 'angstrom': 1}
+
+
+def _read_floats(it):
+    # consumes the lines up to the next blank one and converts all their values at once
+    block = []
+    for line in it:
+        if not line.strip(): break
+        block.append(line)
+    return list(map(float, ' '.join(block).split()))
+
+
+def _read_float_block(it, n, cols):
+    # consumes n lines and converts their values in the cols slice at once, None if the block is incomplete
+    block = []
+    for i in range(n):
+        row = next(it, '').split()[cols]
+        if len(row) != cols.stop - cols.start: return None
+        block.append(row)
+    return array(block, dtype=float)
+
+
+def _get_mult(line, default, alat):
+    # multiplier to Angstrom from the card units, None for the scaled ones
+    m = _UNIT_RE.match(line)
+    unit = m.group(1).lower() if m else default
+    if unit == 'alat': return alat
+    return _UNIT_MULT.get(unit)
+
+
+class _State(object):
+    # parsing state shared by the line handlers, it does not outlive the parsing
+    __slots__ = ('atomic_data', 'cell_data', 'pos_data', 'alat', 'nat', 'e_last',
+                 'kpts', 'eigs_columns', 'tot_k', 'eigs_failed', 'eigs_spin_warning', 'done')
+
+    def __init__(self):
+        self.atomic_data, self.cell_data, self.pos_data, self.alat, self.nat = None, [], [], 0, None
+        self.e_last = None
+        self.kpts, self.eigs_columns, self.tot_k = [], [], 0
+        self.eigs_failed, self.eigs_spin_warning = False, False
+        self.done = False
+
+
+def _scan(lines, handlers, parser, state):
+    # dispatches the lines of interest to the parser handlers
+    # NB only these lines are decoded, the rest are skipped as bytes
+    # NB the lookups are bound locally as this loop runs for every line
+    match = _SCANNER.match
+    raw = iter(lines)
+    it = (line.decode('utf-8', 'replace') for line in raw)
+    for cur_line in raw:
+        m = match(cur_line)
+        if m is None: continue
+        while m:
+            carry = handlers[m.lastgroup](parser, state, cur_line.decode('utf-8', 'replace'), it)
+            if carry is None: break
+            cur_line = carry.encode('utf-8')
+            m = match(cur_line)
+        if state.done: break
+
+
 class QuantumESPRESSO(Output):
+    # taken from trunk/Modules/funct.f90
+    # name: (title, types, setups)
+    _XC_MAP = MappingProxyType({
+        "pw"          : ("PW_LDA",                  (0x1,),            ("sla+pw+nogx+nogc",)),
+
+        "pz"          : ("PZ_LDA",                  (0x1,),            ("sla+pz+nogx+nogc",)),
+        "bp"          : ("Becke-Perdew grad.corr.", (0x2,),            ("b88+p86+nogx+nogc",)),
+        "pw91"        : ("PW91",                    (0x2,),            ("sla+pw+ggx+ggc",)),
+        "blyp"        : ("BLYP",                    (0x2,),            ("sla+b88+lyp+blyp",)),
+        "pbe"         : ("PBE",                     (0x2,),            ("sla+pw+pbx+pbc", "sla+pw+pbe+pbe")),
+        "revpbe"      : ("revPBE",                  (0x2,),            ("sla+pw+rpb+pbc", "sla+pw+rpb+pbe")),
+        "pw86pbe"     : ("PW86+PBE",                (0x2,),            ("sla+pw+pw86+pbc", "sla+pw+pw86+pbe")),
+        "b86bpbe"     : ("B86b+PBE",                (0x2,),            ("sla+pw+b86b+pbc", "sla+pw+b86b+pbe")),
+        "pbesol"      : ("PBEsol",                  (0x2,),            ("sla+pw+psx+psc",)),
+        "q2d"         : ("PBEQ2D",                  (0x2,),            ("sla+pw+q2dx+q2dc",)),
+        "hcth"        : ("HCTH/120",                (0x2,),            ("nox+noc+hcth+hcth",)),
+        "olyp"        : ("OLYP",                    (0x2,),            ("nox+lyp+optx+blyp",)),
+        "wc"          : ("Wu-Cohen",                (0x2,),            ("sla+pw+wcx+pbc", "sla+pw+wcx+pbe")),
+        "sogga"       : ("SOGGA",                   (0x2,),            ("sla+pw+sox+pbc", "sla+pw+sox+pbe")),
+        "optbk88"     : ("optB88",                  (0x2,),            ("sla+pw+obk8+p86",)),
+        "optb86b"     : ("optB86",                  (0x2,),            ("sla+pw+ob86+p86",)),
+        "ev93"        : ("Engel-Vosko",             (0x2,),            ("sla+pw+evx+nogc",)),
+        "tpss"        : ("TPSS",                    (0x3,),            ("sla+pw+tpss+tpss",)),
+        "m06l"        : ("M06L",                    (0x3,),            ("nox+noc+m6lx+m6lc",)),
+        "tb09"        : ("TB09",                    (0x3,),            ("sla+pw+tb09+tb09",)),
+        "pbe0"        : ("PBE0",                    (0x2, 0x4),        ("pb0x+pw+pb0x+pbc", "pb0x+pw+pb0x+pbe")),
+        "hse"         : ("HSE06",                   (0x2, 0x4),        ("sla+pw+hse+pbc", "sla+pw+hse+pbe")),
+        "b3lyp"       : ("B3LYP",                   (0x2, 0x4),        ("b3lp+vwn+b3lp+b3lp",)),
+        "gaupbe"      : ("Gau-PBE",                 (0x2, 0x4),        ("sla+pw+gaup+pbc", "sla+pw+gaup+pbe")),
+        "vdw-df"      : ("vdW-DF",                  (0x2, 0x7),        ("sla+pw+rpb+vdw1",)),
+        "vdw-df2"     : ("vdW-DF2",                 (0x2, 0x7),        ("sla+pw+rw86+vdw2",)),
+        "vdw-df-c09"  : ("vdW-DF-C09",              (0x2, 0x7),        ("sla+pw+c09x+vdw1",)),
+        "vdw-df2-c09" : ("vdW-DF2-C09",             (0x2, 0x7),        ("sla+pw+c09x+vdw2",)),
+        "vdw-df-cx"   : ("vdW-DF-cx",               (0x2, 0x7),        ("sla+pw+cx13+vdW1",)),
+        "vdw-df-obk8" : ("vdW-DF-obk8",             (0x2, 0x7),        ("sla+pw+obk8+vdw1",)),
+        "vdw-df-ob86" : ("vdW-DF-ob86",             (0x2, 0x7),        ("sla+pw+ob86+vdw1",)),
+        "vdw-df2-b86r": ("vdW-DF2-B86R",            (0x2, 0x7),        ("sla+pw+b86r+vdw2",)),
+        "rvv10"       : ("rVV10",                   (0x2, 0x7),        ("sla+pw+rw86+pbc+vv10", "sla+pw+rw86+pbe+vv10")),
+
+        "hf"          : ("Hartree-Fock",            (0x5,),            ("hf+noc+nogx+nogc",)),
+        "vdw-df3"     : ("vdW-DF3",                 (0x2, 0x7),        ("sla+pw+rw86+vdw3",)),
+        "vdw-df4"     : ("vdW-DF4",                 (0x2, 0x7),        ("sla+pw+rw86+vdw4",)),
+        "gaup"        : ("Gau-PBE",                 (0x2, 0x4),        ("sla+pw+gaup+pbc", "sla+pw+gaup+pbe")),
+    })
+    # setup -> (title, types)
+    _XC_SETUP_INDEX = MappingProxyType(dict((setup, (title, types)) for title, types, setups in _XC_MAP.values() for setup in setups))
+
     def __init__(self, filename):
         Output.__init__(self, filename)
 
@@ -29,204 +159,15 @@ class QuantumESPRESSO(Output):
         self.info['finished'] = 0x1
         self.info['ansatz'] = 0x2
 
-        # taken from trunk/Modules/funct.f90
-        xc_internal_map = {
-        "pw"           : {'name': "PW_LDA",                  'type': [0x1],            'setup': ["sla+pw+nogx+nogc"    ] },
-
-        "pz"           : {'name': "PZ_LDA",                  'type': [0x1],            'setup': ["sla+pz+nogx+nogc"    ] },
-        "bp"           : {'name': "Becke-Perdew grad.corr.", 'type': [0x2],            'setup': ["b88+p86+nogx+nogc"   ] },
-        "pw91"         : {'name': "PW91",                    'type': [0x2],            'setup': ["sla+pw+ggx+ggc"      ] },
-        "blyp"         : {'name': "BLYP",                    'type': [0x2],            'setup': ["sla+b88+lyp+blyp"    ] },
-        "pbe"          : {'name': "PBE",                     'type': [0x2],            'setup': ["sla+pw+pbx+pbc", "sla+pw+pbe+pbe"] },
-        "revpbe"       : {'name': "revPBE",                  'type': [0x2],            'setup': ["sla+pw+rpb+pbc", "sla+pw+rpb+pbe"] },
-        "pw86pbe"      : {'name': "PW86+PBE",                'type': [0x2],            'setup': ["sla+pw+pw86+pbc", "sla+pw+pw86+pbe"] },
-        "b86bpbe"      : {'name': "B86b+PBE",                'type': [0x2],            'setup': ["sla+pw+b86b+pbc", "sla+pw+b86b+pbe"] },
-        "pbesol"       : {'name': "PBEsol",                  'type': [0x2],            'setup': ["sla+pw+psx+psc"      ] },
-        "q2d"          : {'name': "PBEQ2D",                  'type': [0x2],            'setup': ["sla+pw+q2dx+q2dc"    ] },
-        "hcth"         : {'name': "HCTH/120",                'type': [0x2],            'setup': ["nox+noc+hcth+hcth"   ] },
-        "olyp"         : {'name': "OLYP",                    'type': [0x2],            'setup': ["nox+lyp+optx+blyp"   ] },
-        "wc"           : {'name': "Wu-Cohen",                'type': [0x2],            'setup': ["sla+pw+wcx+pbc", "sla+pw+wcx+pbe"] },
-        "sogga"        : {'name': "SOGGA",                   'type': [0x2],            'setup': ["sla+pw+sox+pbc", "sla+pw+sox+pbe"] },
-        "optbk88"      : {'name': "optB88",                  'type': [0x2],            'setup': ["sla+pw+obk8+p86"     ] },
-        "optb86b"      : {'name': "optB86",                  'type': [0x2],            'setup': ["sla+pw+ob86+p86"     ] },
-        "ev93"         : {'name': "Engel-Vosko",             'type': [0x2],            'setup': ["sla+pw+evx+nogc"     ] },
-        "tpss"         : {'name': "TPSS",                    'type': [0x3],            'setup': ["sla+pw+tpss+tpss"    ] },
-        "m06l"         : {'name': "M06L",                    'type': [0x3],            'setup': ["nox+noc+m6lx+m6lc"   ] },
-        "tb09"         : {'name': "TB09",                    'type': [0x3],            'setup': ["sla+pw+tb09+tb09"    ] },
-        "pbe0"         : {'name': "PBE0",                    'type': [0x2, 0x4],       'setup': ["pb0x+pw+pb0x+pbc", "pb0x+pw+pb0x+pbe"] },
-        "hse"          : {'name': "HSE06",                   'type': [0x2, 0x4],       'setup': ["sla+pw+hse+pbc", "sla+pw+hse+pbe"] },
-        "b3lyp"        : {'name': "B3LYP",                   'type': [0x2, 0x4],       'setup': ["b3lp+vwn+b3lp+b3lp"  ] },
-        "gaupbe"       : {'name': "Gau-PBE",                 'type': [0x2, 0x4],       'setup': ["sla+pw+gaup+pbc", "sla+pw+gaup+pbe"] },
-        "vdw-df"       : {'name': "vdW-DF",                  'type': [0x2, 0x7],       'setup': ["sla+pw+rpb+vdw1"     ] },
-        "vdw-df2"      : {'name': "vdW-DF2",                 'type': [0x2, 0x7],       'setup': ["sla+pw+rw86+vdw2"    ] },
-        "vdw-df-c09"   : {'name': "vdW-DF-C09",              'type': [0x2, 0x7],       'setup': ["sla+pw+c09x+vdw1"    ] },
-        "vdw-df2-c09"  : {'name': "vdW-DF2-C09",             'type': [0x2, 0x7],       'setup': ["sla+pw+c09x+vdw2"    ] },
-        "vdw-df-cx"    : {'name': "vdW-DF-cx",               'type': [0x2, 0x7],       'setup': ["sla+pw+cx13+vdW1"    ] },
-        "vdw-df-obk8"  : {'name': "vdW-DF-obk8",             'type': [0x2, 0x7],       'setup': ["sla+pw+obk8+vdw1"    ] },
-        "vdw-df-ob86"  : {'name': "vdW-DF-ob86",             'type': [0x2, 0x7],       'setup': ["sla+pw+ob86+vdw1"    ] },
-        "vdw-df2-b86r" : {'name': "vdW-DF2-B86R",            'type': [0x2, 0x7],       'setup': ["sla+pw+b86r+vdw2"    ] },
-        "rvv10"        : {'name': "rVV10",                   'type': [0x2, 0x7],       'setup': ["sla+pw+rw86+pbc+vv10", "sla+pw+rw86+pbe+vv10"] },
-
-        "hf"           : {'name': "Hartree-Fock",            'type': [0x5],            'setup': ["hf+noc+nogx+nogc"    ] },
-        "vdw-df3"      : {'name': "vdW-DF3",                 'type': [0x2, 0x7],       'setup': ["sla+pw+rw86+vdw3"    ] },
-        "vdw-df4"      : {'name': "vdW-DF4",                 'type': [0x2, 0x7],       'setup': ["sla+pw+rw86+vdw4"    ] },
-        "gaup"         : {'name': "Gau-PBE",                 'type': [0x2, 0x4],       'setup': ["sla+pw+gaup+pbc", "sla+pw+gaup+pbe"] },
-        }
-
-        self.data = open(filename).readlines()
-        atomic_data, cell_data, pos_data, symbol_data, alat = None, [], [], [], 0
-        e_last = None
-        kpts, eigs_columns, tot_k = [], [], 0
+        # NB the output is read at once, the few blocks looking ahead consume the lines they need
+        with open(filename, 'rb') as f:
+            lines = f.read().splitlines()
+        state = _State()
+        _scan(lines, self._handlers, self, state)
 
-        for n in range(len(self.data)):
-            cur_line = self.data[n]
-
-            if "This run was terminated on" in cur_line:
-                self.info['finished'] = 0x2
-
-            elif "     Program PWSCF" in cur_line and " starts " in cur_line:
-                ver_str = cur_line.strip().replace('Program PWSCF', '')
-                ver_str = ver_str[ : ver_str.find(' starts ') ].strip()
-                if ver_str.startswith("v."): ver_str = ver_str[2:]
-                self.info['prog'] = ver_str
-
-            elif cur_line.startswith("     celldm"):
-                if not alat:
-                    alat = float(cur_line.split()[1]) * Bohr
-                    if not alat: alat = 1
-
-            elif cur_line.startswith("     crystal axes:"):
-                cell_data = [x.split()[3:6] for x in self.data[n + 1:n + 4]]
-                cell_data = array([[float(col) for col in row] for row in cell_data])
-
-            elif cur_line.startswith("     site n."):
-                if len(pos_data): continue
-
-                while True:
-                    n += 1
-                    next_line = self.data[n].split()
-                    if not next_line: break
-                    pos_data.append([float(x) for x in next_line[-4:-1]])
-                    symbol = next_line[1].strip('0123456789').split('_')[0]
-                    if not symbol in chemical_symbols and len(symbol) > 1: symbol = symbol[:-1]
-                    symbol_data.append(symbol)
-                pos_data = array(pos_data)*alat
-                atomic_data = Atoms(symbol_data, pos_data, cell=cell_data*alat, pbc=(1,1,1))
-
-            elif "CELL_PARAMETERS" in cur_line:
-                for i in range(3):
-                    n += 1
-                    next_line = self.data[n].split()
-                    if not next_line: break
-                    cell_data[i][:] = list(map(float, next_line))
-                else:
-                    mult = 1
-                    if "bohr" in cur_line: mult = Bohr
-                    elif "alat" in cur_line: mult = alat
-                    atomic_data.set_cell(cell_data*mult, scale_atoms=True)
-
-            elif "ATOMIC_POSITIONS" in cur_line:
-                coord_flag = cur_line.split('(')[-1].strip()
-                for i in range(len(pos_data)):
-                    n += 1
-                    next_line = self.data[n].split()
-                    pos_data[i][:] = list(map(float, next_line[1:4]))
-                if not atomic_data: continue
-
-                if coord_flag=='alat)':
-                    atomic_data.set_positions(pos_data*alat)
-                elif coord_flag=='bohr)':
-                    atomic_data.set_positions(pos_data*Bohr)
-                elif coord_flag=='angstrom)':
-                    atomic_data.set_positions(pos_data)
-                else:
-                    atomic_data.set_scaled_positions(pos_data)
-
-            elif cur_line.startswith("!    total energy"):
-                self.info['energy'] = float(cur_line.split()[-2]) * Rydberg
-
-            elif "     Exchange-correlation" in cur_line:
-                if self.info['H']: continue
-
-                xc_str = cur_line.split('=')[-1].strip()
-                xc_parts = xc_str[ : xc_str.find("(") ].split()
-                if len(xc_parts) == 1: xc_parts = xc_parts[0].split('+')
-                if len(xc_parts) < 4: xc_parts = [ '+'.join(xc_parts) ]
-                xc_parts = [x.lower().strip("-'\"") for x in xc_parts]
-
-                if len(xc_parts) == 1:
-                    try:
-                        self.info['H'] = xc_internal_map[xc_parts[0]]['name']
-                        self.info['H_types'].extend( xc_internal_map[xc_parts[0]]['type'] )
-                    except KeyError:
-                        self.info['H'] = xc_parts[0]
-                else:
-                    xc_parts = '+'.join(xc_parts)
-                    match = [ i for i in list(xc_internal_map.values()) if xc_parts in i['setup'] ]
-                    if match:
-                        self.info['H'] = match[0]['name']
-                        self.info['H_types'].extend( match[0]['type'] )
-                    else:
-                        self.info['H'] = xc_parts
-
-            elif "PWSCF        :" in cur_line:
-                if "WALL" in cur_line or "wall" in cur_line:
-                    d = cur_line.split("CPU")[-1].replace("time", "").replace(",", "")
-                    if d.find("s") > 0: d = d[ : d.find("s") + 1 ]
-                    elif d.find("m") > 0: d = d[ : d.find("m") + 1 ]
-                    elif d.find("h") > 0: d = d[ : d.find("h") + 1 ]
-                    d = d.strip().replace(" ", "")
-                    fmt = ""
-                    if 's' in d: fmt = "%S.%fs"
-                    if 'm' in d: fmt = "%Mm" + fmt
-                    if 'h' in d: fmt = "%Hh" + fmt
-                    if 'd' in d: fmt = "%dd" + fmt # FIXME for months!
-                    d = time.strptime(d, fmt)
-                    # to comply with python 2.6
-                    td = datetime.timedelta(days=d.tm_mday, hours=d.tm_hour, minutes=d.tm_min, seconds=d.tm_sec)
-                    self.info['duration'] = "%2.2f" % ( (td.microseconds + (td.seconds + td.days * 24 * 3600) * 10**6) / 3.6e9 )
-                    self.info['finished'] = 0x2
-
-            elif "End of self-consistent calculation" in cur_line or "End of band structure calculation" in cur_line:
-                e_last = None
-                kpts, eigs_columns, tot_k = [], [], 0
-                eigs_collect, eigs_failed = False, False
-                eigs_spin_warning = False
-                if not atomic_data: eigs_failed = True
-
-                while not eigs_failed:
-                    n += 1
-                    next_line = self.data[n]
-                    if eigs_collect:
-                        next_line = next_line.split()
-                        if next_line:
-                            try: eigs_columns[-1] += list(map(float, next_line))
-                            except ValueError: eigs_failed = True
-                        else: eigs_collect = False
-                        continue
-
-                    if "Ry" in next_line or "CPU" in next_line:
-                        eigs_failed = True
-                    elif "    k =" in next_line:
-                        tot_k += 1
-                        coords = next_line.strip().replace("k =", "")[:21]
-                        try: kpts.append(list(map(float, [coords[0:7], coords[7:14], coords[14:21]])))
-                        except ValueError: eigs_failed = True
-                        eigs_collect = True
-                        eigs_columns.append([])
-                        n += 1
-                    elif "highest occupied level" in next_line:
-                        e_last = float(next_line.split()[-1])
-                        break
-                    elif "highest occupied, lowest unoccupied" in next_line:
-                        e_last = float(next_line.split()[-2])
-                        break
-                    elif "Fermi energy" in next_line:
-                        e_last = float(next_line.split()[-2])
-                        break
-                    elif " SPIN UP " in next_line or " SPIN DOWN " in next_line:
-                        self.info['spin'] = True
-                        eigs_spin_warning = True
+        atomic_data, e_last = state.atomic_data, state.e_last
+        kpts, eigs_columns, tot_k = state.kpts, state.eigs_columns, state.tot_k
+        eigs_failed, eigs_spin_warning = state.eigs_failed, state.eigs_spin_warning
 
         # Only the last set is taken
         if kpts and eigs_columns:
@@ -272,6 +213,169 @@ class QuantumESPRESSO(Output):
                 self.related_files.append(os.path.join(cur_folder, candidates[0]))
                 self.info['input'] = open(os.path.join(cur_folder, candidates[0])).read()
 
+    # Line handlers: each gets the parsing state, the matched line and the lines iterator to look ahead,
+    # a line returned back is not consumed and is dispatched once more
+    def _on_terminated(self, state, line, it):
+        self.info['finished'] = 0x2
+        # NB the timing is printed just before, nothing of interest follows
+        if self.info['duration']: state.done = True
+
+    def _on_prog(self, state, line, it):
+        m = _PWSCF_VER_RE.search(line)
+        if m: self.info['prog'] = m.group(1)
+
+    def _on_celldm(self, state, line, it):
+        if not state.alat:
+            state.alat = float(line.split()[1]) * Bohr
+            if not state.alat: state.alat = 1
+
+    def _on_cell(self, state, line, it):
+        state.cell_data = array([next(it, '').split()[3:6] for i in range(3)], dtype=float)
+
+    def _on_nat(self, state, line, it):
+        state.nat = int(line.split()[-1])
+
+    def _on_sites(self, state, line, it):
+        if len(state.pos_data): return
+
+        # NB the number of atoms is printed earlier, otherwise the list ends with a blank line
+        block = []
+        while len(block) != state.nat:
+            next_line = next(it, '').split()
+            if not next_line: break
+            block.append(next_line)
+
+        symbol_data = []
+        for next_line in block:
+            symbol = next_line[1].strip(_DIGITS).split('_')[0]
+            if symbol not in _CHEMICAL_SYMBOLS and len(symbol) > 1: symbol = symbol[:-1]
+            symbol_data.append(symbol)
+        state.pos_data = array([row[-4:-1] for row in block], dtype=float).reshape(-1, 3)*state.alat
+        state.atomic_data = Atoms(symbol_data, state.pos_data, cell=state.cell_data*state.alat, pbc=(1,1,1))
+
+    def _on_cell_parameters(self, state, line, it):
+        cell_data = _read_float_block(it, 3, slice(0, 3))
+        if cell_data is None: return
+        state.cell_data = cell_data
+        if not state.atomic_data: return
+
+        state.atomic_data.set_cell(cell_data*(_get_mult(line, 'angstrom', state.alat) or 1), scale_atoms=True)
+
+    def _on_positions(self, state, line, it):
+        if not len(state.pos_data): return
+        pos_data = _read_float_block(it, len(state.pos_data), slice(1, 4))
+        if pos_data is None: return
+        state.pos_data = pos_data
+        if not state.atomic_data: return
+
+        mult = _get_mult(line, 'crystal', state.alat)
+        if mult is None: state.atomic_data.set_scaled_positions(pos_data)
+        else: state.atomic_data.set_positions(pos_data*mult)
+
+    def _on_energy(self, state, line, it):
+        self.info['energy'] = float(line.split()[-2]) * Rydberg
+
+    def _on_xc(self, state, line, it):
+        if self.info['H']: return
+
+        xc_str = line.split('=')[-1].strip()
+        xc_parts = xc_str[ : xc_str.find("(") ].split()
+        if len(xc_parts) == 1: xc_parts = xc_parts[0].split('+')
+
+        if len(xc_parts) < 4:
+            xc_name = '+'.join(xc_parts).lower().strip("-'\"")
+            try:
+                self.info['H'], types, _ = self._XC_MAP[xc_name]
+                self.info['H_types'].extend( types )
+            except KeyError:
+                self.info['H'] = xc_name
+        else:
+            xc_setup = '+'.join(x.lower().strip("-'\"") for x in xc_parts)
+            hit = self._XC_SETUP_INDEX.get(xc_setup)
+            if hit:
+                self.info['H'] = hit[0]
+                self.info['H_types'].extend( hit[1] )
+            else:
+                self.info['H'] = xc_setup
+
+    def _on_timing(self, state, line, it):
+        m = _WALL_RE.search(line)
+        if not m: return
+
+        d = _DURATION_RE.match(m.group(1).replace(" ", ""))
+        if not d: return
+        days, hours, mins, secs = (float(x or 0) for x in d.groups())
+        self.info['duration'] = "%2.2f" % (days*24 + hours + mins/60 + secs/3600)
+        self.info['finished'] = 0x2
+
+    def _on_eigenvalues(self, state, line, it):
+        e_last = None
+        kpts, eigs_columns, tot_k = [], [], 0
+        eigs_failed = False
+        eigs_spin_warning = False
+        carry = None
+        if not state.atomic_data: eigs_failed = True
+
+        while not eigs_failed:
+            next_line = next(it, None)
+            if next_line is None:
+                eigs_failed = True
+                continue
+
+            # NB the markers start their lines, only an unknown line is scanned through
+            head = next_line.lstrip()
+            if head.startswith("k ="):
+                tot_k += 1
+                coords = head[3:24]
+                try: kpts.append(list(map(float, [coords[0:7], coords[7:14], coords[14:21]])))
+                except ValueError: eigs_failed = True
+                next(it, '')
+                try: eigs_columns.append(_read_floats(it))
+                except ValueError: eigs_failed = True
+            elif head.startswith("highest occupied level"):
+                e_last = float(head.split()[-1])
+                break
+            elif head.startswith("highest occupied, lowest unoccupied"):
+                e_last = float(head.split()[-2])
+                break
+            elif head.startswith("the Fermi energy"):
+                e_last = float(head.split()[-2])
+                break
+            elif head.startswith("------ SPIN UP ") or head.startswith("------ SPIN DOWN "):
+                self.info['spin'] = True
+                eigs_spin_warning = True
+            elif "Ry" in head or "CPU" in head:
+                eigs_failed = True
+                carry = next_line # NB not ours, to be examined once more
+
+        state.e_last = e_last
+        state.kpts, state.eigs_columns, state.tot_k = kpts, eigs_columns, tot_k
+        state.eigs_failed, state.eigs_spin_warning = eigs_failed, eigs_spin_warning
+        return carry
+
+    _handlers = {
+        'celldm':          _on_celldm,
+        'cell':            _on_cell,
+        'sites':           _on_sites,
+        'energy':          _on_energy,
+        'xc':              _on_xc,
+        'prog':            _on_prog,
+        'timing':          _on_timing,
+        'nat':             _on_nat,
+        'terminated':      _on_terminated,
+        'cell_parameters': _on_cell_parameters,
+        'positions':       _on_positions,
+        'eigenvalues':     _on_eigenvalues,
+    }
+
+    @classmethod
+    def parse_many(cls, filenames, workers=None):
+        # parses the outputs in a pool of processes, yielding them in the given order
+        # NB chunks are sent at once to cut the pickling overhead
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for calc in executor.map(cls, filenames, chunksize=8):
+                yield calc
+
     @staticmethod
     def fingerprints(test_string):
         if ("pwscf" in test_string or "PWSCF" in test_string) and "     Current dimensions of program " in test_string: